@@ -2,11 +2,14 @@
 Align multiple sequences from FASTA.
 """
 
+import mmap
 import os
+import stat
 from shutil import copyfile
 import numpy as np
 from Bio import AlignIO, SeqIO, Seq, Align
-from .utils import run_shell_command, nthreads_value, shquote
+from Bio.SeqRecord import SeqRecord
+from .utils import run_shell_command, nthreads_value, shquote, write_fasta, FILE_BUFFER_SIZE
 from collections import defaultdict
 
 class AlignmentError(Exception):
@@ -181,7 +184,7 @@ def read_sequences(*fnames):
     seqs = {}
     try:
         for fname in fnames:
-            for record in SeqIO.parse(fname, 'fasta'):
+            for record in _read_fasta(fname):
                 if record.name in seqs and record.seq != seqs[record.name].seq:
                     raise AlignmentError("Detected duplicate input strains \"%s\" but the sequences are different." % record.name)
                     # if the same sequence then we can proceed (and we only take one)
@@ -192,6 +195,92 @@ def read_sequences(*fnames):
         raise AlignmentError("\nERROR: Problem reading in {}: {}".format(fname, str(error)))
     return list(seqs.values())
 
+def _read_fasta(fname):
+    """Yield SeqRecords from a FASTA file without going through SeqIO.parse.
+
+    This skips the per-record overhead of SeqIO.parse while producing records
+    with the same id, name and description. Files are read in binary mode and
+    parsed as bytes, so only titles and sequences are ever decoded. Regular
+    files are memory-mapped and split into records with bytes operations;
+    other files (e.g., pipes) and regular files that cannot be memory-mapped
+    are read line by line through a large buffer.
+    """
+    with open(fname, 'rb', buffering=FILE_BUFFER_SIZE) as handle:
+        data = None
+        stat_result = os.fstat(handle.fileno())
+        if stat.S_ISREG(stat_result.st_mode):
+            if stat_result.st_size == 0:
+                return
+            try:
+                data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Some filesystems (e.g., FUSE or network mounts) do not
+                # support mmap, and large files cannot be mapped on 32-bit
+                # platforms. Such files are read line by line instead.
+                pass
+
+        if data is not None:
+            with data:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+                for title, sequence in _parse_fasta_bytes(data):
+                    yield _fasta_record(title, sequence)
+        else:
+            for title, sequence in _parse_fasta_lines(handle):
+                yield _fasta_record(title, sequence)
+
+def _parse_fasta_lines(lines):
+    """Yield (title, sequence) string tuples from an iterable of FASTA
+    formatted bytes lines, with the same semantics as _parse_fasta_bytes.
+
+    >>> list(_parse_fasta_lines([b"comment\\n", b">SEQ1 first\\n", b"AC GT\\r\\n", b"AA\\n", b">SEQ2\\n"]))
+    [('SEQ1 first', 'ACGTAA'), ('SEQ2', '')]
+    """
+    title = None
+    sequence_lines = []
+    for line in lines:
+        if line[:1] == b">":
+            if title is not None:
+                yield title, b"".join(b"".join(sequence_lines).split()).decode('utf-8')
+            title = line[1:].rstrip().decode('utf-8')
+            sequence_lines = []
+        elif title is not None:
+            sequence_lines.append(line)
+
+    if title is not None:
+        yield title, b"".join(b"".join(sequence_lines).split()).decode('utf-8')
+
+def _parse_fasta_bytes(data):
+    """Yield (title, sequence) string tuples from FASTA formatted bytes.
+
+    Like SimpleFastaParser, any text before the first record is skipped and
+    whitespace within sequences is removed.
+
+    >>> list(_parse_fasta_bytes(b"comment\\n>SEQ1 first\\nAC GT\\r\\nAA\\n>SEQ2\\n"))
+    [('SEQ1 first', 'ACGTAA'), ('SEQ2', '')]
+    """
+    if data[:1] == b">":
+        start = 0
+    else:
+        start = data.find(b"\n>")
+        if start == -1:
+            return
+        start += 1
+
+    while start != -1:
+        end = data.find(b"\n>", start)
+        record = data[start + 1:] if end == -1 else data[start + 1:end]
+        header, _, body = record.partition(b"\n")
+        yield header.rstrip().decode('utf-8'), b"".join(body.split()).decode('utf-8')
+        start = end if end == -1 else end + 1
+
+def _fasta_record(title, sequence):
+    try:
+        name = title.split(None, 1)[0]
+    except IndexError:
+        name = ""
+    return SeqRecord(Seq.Seq(sequence), id=name, name=name, description=title)
+
 def check_arguments(args):
     # Simple error checking related to a reference name/sequence
     if args.reference_name and args.reference_sequence:
@@ -408,9 +497,10 @@ def check_duplicates(*values):
             raise TypeError()
 
 def write_seqs(seqs, fname):
-    """A wrapper around SeqIO.write with error handling"""
+    """Write sequences to a FASTA file with error handling"""
     try:
-        SeqIO.write(seqs, fname, 'fasta')
+        with open(fname, 'w', encoding='utf-8') as handle:
+            write_fasta(seqs, handle)
     except FileNotFoundError:
         raise AlignmentError('ERROR: Couldn\'t write "{}" -- perhaps the directory doesn\'t exist?'.format(fname))
 
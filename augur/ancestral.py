@@ -3,10 +3,10 @@ Infer ancestral sequences based on a tree.
 """
 
 import os, shutil, time, json, sys
-from Bio import Phylo, SeqIO
+from Bio import Phylo
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
-from .utils import read_tree, InvalidTreeError, write_json, get_json_name
+from .utils import read_tree, InvalidTreeError, write_json, get_json_name, write_fasta
 from treetime.vcf_utils import read_vcf, write_vcf
 from collections import defaultdict
 
@@ -198,7 +198,8 @@ def run(args):
                 SeqRecord(Seq(node_data["sequence"]), id=node_name, description="")
                 for node_name, node_data in anc_seqs["nodes"].items()
             ]
-            SeqIO.write(records, args.output_sequences, "fasta")
+            with open(args.output_sequences, "w", encoding='utf-8') as handle:
+                write_fasta(records, handle)
             print("ancestral sequences FASTA written to", args.output_sequences, file=sys.stdout)
 
     # If VCF, output VCF including new ancestral seqs
@@ -14,7 +14,7 @@ from tempfile import NamedTemporaryFile
 import treetime.utils
 
 from .index import index_sequences
-from .utils import read_metadata, get_numerical_dates, run_shell_command, shquote, is_date_ambiguous
+from .utils import read_metadata, get_numerical_dates, run_shell_command, shquote, is_date_ambiguous, write_fasta
 
 comment_char = '#'
 MAX_NUMBER_OF_PROBABILISTIC_SAMPLING_ATTEMPTS = 10
@@ -490,7 +490,8 @@ def run(args):
         # Write out sequences that passed all filters using an iterator to
         # ensure that sequences are streamed to disk without being read into
         # memory first.
-        sequences_written = SeqIO.write(sequences_to_write, args.output, 'fasta')
+        with open(args.output, "w", encoding='utf-8') as output_handle:
+            sequences_written = write_fasta(sequences_to_write, output_handle)
 
         if sequences_written == 0:
             print("ERROR: All samples have been dropped! Check filter rules and metadata file format.", file=sys.stderr)
@@ -10,7 +10,7 @@ import pandas as pd
 from Bio import SeqIO
 from Bio.Seq import MutableSeq
 
-from .utils import run_shell_command, shquote, open_file, is_vcf, load_mask_sites, VALID_NUCLEOTIDES
+from .utils import run_shell_command, shquote, open_file, is_vcf, load_mask_sites, write_fasta, VALID_NUCLEOTIDES
 
 def get_chrom_name(vcf_file):
     """Read the CHROM field from the first non-header line of a vcf file.
@@ -97,9 +97,7 @@ def mask_fasta(mask_sites, in_file, out_file, mask_from_beginning=0, mask_from_e
     # into memory.
     alignment = SeqIO.parse(in_file, "fasta")
 
-    # Write the masked alignment to disk one record at a time.
-    print("Removing masked sites from FASTA file.")
-    with open_file(out_file, "w") as oh:
+    def masked_records():
         for record in alignment:
             # Convert to a mutable sequence to enable masking with Ns.
             sequence_length = len(record.seq)
@@ -115,7 +113,12 @@ def mask_fasta(mask_sites, in_file, out_file, mask_from_beginning=0, mask_from_e
                 if site < sequence_length:
                     sequence[site] = "N"
             record.seq = sequence
-            SeqIO.write(record, oh, "fasta")
+            yield record
+
+    # Stream the masked alignment to disk.
+    print("Removing masked sites from FASTA file.")
+    with open_file(out_file, "w") as oh:
+        write_fasta(masked_records(), oh)
 
 def register_arguments(parser):
     parser.add_argument('--sequences', '-s', required=True, help="sequences in VCF or FASTA format")
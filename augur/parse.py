@@ -5,6 +5,8 @@ Parse delimited fields from FASTA sequence names into a TSV and FASTA file.
 from Bio import SeqIO
 import pandas as pd
 
+from .utils import SequenceWriter
+
 forbidden_chactacters = str.maketrans(
     {' ': None,
      '(': '_',
@@ -98,7 +100,7 @@ def run(args):
         strain_key = args.fields[0]
 
     # loop over sequences, parse fasta header of each sequence
-    with open(args.output_sequences, 'w', encoding='utf-8') as output:
+    with SequenceWriter(args.output_sequences) as output:
         for seq in seqs:
             fields = map(str.strip, seq.description.split(args.separator))
             tmp_meta = dict(zip(args.fields, fields))
@@ -122,7 +124,7 @@ def run(args):
                 del tmp_meta['strain']
             meta_data[seq.id] = tmp_meta
 
-            SeqIO.write(seq, output, 'fasta')
+            output.write(seq)
 
     df = pd.DataFrame.from_dict(meta_data, orient='index')
     df.to_csv(args.output_metadata, index_label='strain',
@@ -6,7 +6,7 @@ import os, sys
 import numpy as np
 from collections import defaultdict
 from Bio import SeqIO, Seq, SeqRecord, Phylo
-from .utils import read_node_data, write_json
+from .utils import read_node_data, write_json, write_fasta
 from treetime.vcf_utils import read_vcf
 
 
@@ -102,4 +102,5 @@ def run(args):
     # write alignments to file
     seqs = [SeqRecord.SeqRecord(seq=Seq.Seq(sequences[strain]), id=strain, name=strain, description='')
             for strain in sequences if is_terminal[strain] or args.internal_nodes]
-    SeqIO.write(seqs, args.output, 'fasta')
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        write_fasta(seqs, handle)
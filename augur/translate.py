@@ -4,8 +4,8 @@ Translate gene regions from nucleotides to amino acids.
 
 import os, sys
 import numpy as np
-from Bio import SeqIO, SeqFeature, Seq, SeqRecord, Phylo
-from .utils import read_node_data, load_features, write_json, write_VCF_translation, get_json_name
+from Bio import SeqFeature, Seq, SeqRecord, Phylo
+from .utils import read_node_data, load_features, write_json, write_VCF_translation, get_json_name, write_fasta
 from treetime.vcf_utils import read_vcf
 
 class MissingNodeError(Exception):
@@ -433,8 +433,9 @@ def run(args):
             ## write fasta-style output if requested
             if '%GENE' in args.alignment_output:
                 for fname, seqs in translations.items():
-                    SeqIO.write([SeqRecord.SeqRecord(seq=Seq.Seq(s), id=sname, name=sname, description='')
-                                 for sname, s in seqs.items()],
-                                 args.alignment_output.replace('%GENE', fname), 'fasta')
+                    with open(args.alignment_output.replace('%GENE', fname), 'w', encoding='utf-8') as handle:
+                        write_fasta((SeqRecord.SeqRecord(seq=Seq.Seq(s), id=sname, name=sname, description='')
+                                     for sname, s in seqs.items()),
+                                    handle)
             else:
                 print("ERROR: alignment output file does not contain '%GENE', so will not be written.")
@@ -13,7 +13,7 @@ import numpy as np
 from treetime.vcf_utils import read_vcf
 from pathlib import Path
 
-from .utils import run_shell_command, nthreads_value, shquote, load_mask_sites
+from .utils import run_shell_command, nthreads_value, shquote, load_mask_sites, write_fasta
 
 def find_executable(names, default = None):
     """
@@ -231,7 +231,6 @@ def build_iqtree(aln_file, out_file, substitution_model="GTR", clean_up=True, nt
 
 
 def write_out_informative_fasta(compress_seq, alignment, stripFile=None):
-    from Bio import SeqIO
     from Bio.SeqRecord import SeqRecord
     from Bio.Seq import Seq
 
@@ -278,7 +277,8 @@ def write_out_informative_fasta(compress_seq, alignment, stripFile=None):
     fasta_file = os.path.join(os.path.dirname(alignment), 'informative_sites.fasta')
 
     #now output this as fasta to read into raxml or iqtree
-    SeqIO.write(toFasta, fasta_file, 'fasta')
+    with open(fasta_file, 'w', encoding='utf-8') as handle:
+        write_fasta(toFasta, handle)
 
     #If want a position map, print:
     if printPositionMap:
@@ -317,10 +317,7 @@ def mask_sites_in_multiple_sequence_alignment(alignment_file, excluded_sites_fil
     # into memory.
     alignment = Bio.SeqIO.parse(alignment_file, "fasta")
 
-    # Write the masked alignment to disk one record at a time.
-    alignment_file_path = Path(alignment_file)
-    masked_alignment_file = str(alignment_file_path.parent / ("masked_%s" % alignment_file_path.name))
-    with open(masked_alignment_file, "w", encoding='utf-8') as oh:
+    def masked_records():
         for record in alignment:
             # Convert to a mutable sequence to enable masking with Ns.
             sequence = record.seq.tomutable()
@@ -330,7 +327,13 @@ def mask_sites_in_multiple_sequence_alignment(alignment_file, excluded_sites_fil
                 sequence[site] = "N"
 
             record.seq = sequence
-            Bio.SeqIO.write(record, oh, "fasta")
+            yield record
+
+    # Stream the masked alignment to disk.
+    alignment_file_path = Path(alignment_file)
+    masked_alignment_file = str(alignment_file_path.parent / ("masked_%s" % alignment_file_path.name))
+    with open(masked_alignment_file, "w", encoding='utf-8') as oh:
+        write_fasta(masked_records(), oh)
 
     # Return the new alignment FASTA filename.
     return masked_alignment_file
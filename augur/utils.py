@@ -1,16 +1,23 @@
 import argparse
 import Bio
 import Bio.Phylo
+import bz2
 import gzip
+import lzma
 import os, json, sys
+import queue
 import pandas as pd
 import subprocess
 import shlex
-from contextlib import contextmanager
+import shutil
+import threading
+from contextlib import contextmanager, ExitStack
 from treetime.utils import numeric_date
 from collections import defaultdict
 from pkg_resources import resource_stream
-from io import TextIOWrapper
+from Bio.SeqIO.FastaIO import as_fasta
+from Bio.SeqRecord import SeqRecord
+from io import BufferedReader, BufferedWriter, TextIOWrapper
 from .__version__ import __version__
 
 from augur.util_support.color_parser import ColorParser
@@ -24,18 +31,290 @@ class AugurException(Exception):
     pass
 
 
+# Buffer size for file handles returned by open_file. Larger buffers than the
+# 8 KiB default mean fewer read and write calls when streaming large sequence
+# files.
+FILE_BUFFER_SIZE = 1 << 18
+
+# Number of formatted records write_fasta joins into a single write call.
+FASTA_WRITE_BATCH_SIZE = 1024
+
+# Maximum number of batches write_fasta queues for its background writer.
+# Each queued item is a whole joined batch of FASTA_WRITE_BATCH_SIZE records,
+# so at most WRITE_QUEUE_SIZE + 3 batches are in memory at once: the queued
+# ones, the one being written, and the producer's batch list together with
+# the string joined from it while it waits to be queued. In the worst case
+# that is 5 * 1024 records, e.g. ~155 MB for ~30 kb SARS-CoV-2 genomes.
+WRITE_QUEUE_SIZE = 2
+
+
 @contextmanager
-def open_file(fname, mode):
-    """Open a file using either gzip.open() or open() depending on file name. Semantics identical to open()"""
-    if fname.endswith('.gz'):
-        if "t" not in mode:
-            # For interoperability, gzip needs to open files in "text" mode
-            mode = mode + "t"
-        with gzip.open(fname, mode, encoding='utf-8') as fh:
-            yield fh
+def open_file(fname, mode, compresslevel=None):
+    """Open a file using gzip, bz2, lzma, zstandard or open() depending on file name.
+
+    The opener is looked up by the (case-insensitive) file extension in
+    ``_OPENERS``. Compressed files are always opened in "text" mode.
+    Zstandard-compressed (``.zst``) files require the optional ``zstandard``
+    package and are compressed with all available cores.
+
+    Gzipped files opened for reading are decompressed by an external ``pigz``
+    or ``gzip`` process when one is available, which is considerably faster
+    than Python's gzip module and moves decompression off the main thread.
+    The handle is then a pipe, so it is not seekable. Decompression errors
+    (e.g., a truncated file) are only raised as an AugurException when the
+    ``with`` block exits normally, after the data that could be decompressed
+    has been read. They are not raised if the block is left early, by an
+    exception or by a ``break``.
+
+    Files opened for reading are advised to the kernel as sequentially read.
+
+    Compressed files opened for writing are compressed at ``compresslevel``.
+    If it is None, the level is taken from the environment variable
+    ``AUGUR_COMPRESSLEVEL`` or defaults to 6 (the default of command line
+    gzip) instead of Python's much slower default of 9. ``.zst`` files default
+    to level 3 instead, the default of zstd itself.
+    """
+    opener = _OPENERS.get(os.path.splitext(fname)[1].lower(), _open_plain)
+    with opener(fname, mode, compresslevel) as fh:
+        if "r" in mode:
+            _advise_sequential(fh)
+        yield fh
+
+def _default_compresslevel(default=6):
+    """Return the compression level from ``AUGUR_COMPRESSLEVEL``, or `default` if unset."""
+    value = os.environ.get("AUGUR_COMPRESSLEVEL")
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise AugurException("Invalid AUGUR_COMPRESSLEVEL value {!r}: expected an integer compression level such as 6.".format(value))
+
+def _advise_sequential(handle):
+    """Tell the kernel that the file behind `handle` will be read sequentially,
+    which enlarges its readahead window. This is only a hint, so it is skipped
+    where unsupported (e.g., on pipes or platforms without posix_fadvise).
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(handle.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    except (OSError, ValueError):
+        pass
+
+def _open_plain(fname, mode, compresslevel):
+    return open(fname, mode, buffering=FILE_BUFFER_SIZE, encoding='utf-8')
+
+def _open_gzip(fname, mode, compresslevel):
+    if "r" in mode and os.path.isfile(fname):
+        decompressor = shutil.which("pigz") or shutil.which("gzip")
+        if decompressor:
+            return _open_decompressed_pipe(decompressor, fname)
+
+    # A large buffer means fewer calls into GzipFile, and on writes each call
+    # compresses a whole buffer at once. Reads of the compressed file itself
+    # still go through GzipFile's own small buffer.
+    if "r" in mode:
+        buffered = BufferedReader(gzip.GzipFile(fname, "rb"), buffer_size=FILE_BUFFER_SIZE)
     else:
-        with open(fname, mode, encoding='utf-8') as fh:
+        if compresslevel is None:
+            compresslevel = _default_compresslevel()
+        gzip_file = gzip.GzipFile(fname, _binary_mode(mode), compresslevel=compresslevel)
+        buffered = BufferedWriter(gzip_file, buffer_size=FILE_BUFFER_SIZE)
+    return TextIOWrapper(buffered, encoding='utf-8')
+
+def _open_bz2(fname, mode, compresslevel):
+    if "r" in mode:
+        return bz2.open(fname, _binary_mode(mode) + "t", encoding='utf-8')
+    if compresslevel is None:
+        compresslevel = _default_compresslevel()
+    return bz2.open(fname, _binary_mode(mode) + "t", compresslevel=compresslevel, encoding='utf-8')
+
+def _open_xz(fname, mode, compresslevel):
+    # lzma only accepts a compression preset when writing.
+    if "r" in mode:
+        return lzma.open(fname, _binary_mode(mode) + "t", encoding='utf-8')
+    if compresslevel is None:
+        compresslevel = _default_compresslevel()
+    return lzma.open(fname, _binary_mode(mode) + "t", preset=compresslevel, encoding='utf-8')
+
+def _open_zstd(fname, mode, compresslevel):
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("To read or write zstandard-compressed (.zst) files, you need a working installation of zstandard")
+
+    # The (de)compressor is built before the file is opened, so the file is
+    # not left open if that fails.
+    if "r" in mode:
+        # Files from pzstd or concatenated .zst files contain multiple frames.
+        decompressor = zstandard.ZstdDecompressor()
+        reader = decompressor.stream_reader(
+            open(fname, "rb"),
+            read_across_frames=True,
+            closefd=True,
+        )
+        buffered = BufferedReader(reader, buffer_size=FILE_BUFFER_SIZE)
+    else:
+        if compresslevel is None:
+            compresslevel = _default_compresslevel(default=3)
+        # Compress with all available cores.
+        compressor = zstandard.ZstdCompressor(level=compresslevel, threads=-1)
+        writer = compressor.stream_writer(
+            open(fname, _binary_mode(mode) + "b"),
+            closefd=True,
+            write_return_read=True,
+        )
+        buffered = BufferedWriter(writer, buffer_size=FILE_BUFFER_SIZE)
+    return TextIOWrapper(buffered, encoding='utf-8')
+
+def _binary_mode(mode):
+    return mode.replace("t", "").replace("b", "")
+
+@contextmanager
+def _open_decompressed_pipe(decompressor, fname):
+    """Yield a text handle on the stdout of ``decompressor -dc fname``."""
+    process = subprocess.Popen([decompressor, "-dc", fname], stdout=subprocess.PIPE, bufsize=FILE_BUFFER_SIZE)
+    try:
+        with TextIOWrapper(process.stdout, encoding='utf-8') as fh:
             yield fh
+    finally:
+        # Closing stdout above stops a decompressor that is still writing with
+        # SIGPIPE, so this does not block when callers stop reading early.
+        returncode = process.wait()
+
+    # A negative return code means the process was stopped by a signal, which
+    # is expected when reading stops early. A positive return code means
+    # decompression itself failed.
+    if returncode > 0:
+        raise AugurException("Failed to decompress %s with %s (exit status %d)." % (fname, decompressor, returncode))
+
+_OPENERS = {
+    ".gz": _open_gzip,
+    ".bz2": _open_bz2,
+    ".xz": _open_xz,
+    ".zst": _open_zstd,
+}
+
+def write_fasta(records, handle, batch_size=FASTA_WRITE_BATCH_SIZE):
+    """Write SeqRecords to an open handle in FASTA format.
+
+    Formatted records are joined and written in batches of `batch_size`,
+    which avoids a write (and, for compressed handles, a call into zlib) per
+    record. Once there is more than one batch to write, batches are handed to
+    a background thread, so formatting records overlaps with compressing and
+    writing previous batches. This only pays off for compressed handles (e.g.,
+    from open_file() on a ``.gz`` file), whose compressors release the GIL.
+    For plain files the thread has little to overlap, but costs only one
+    thread per call.
+
+    Parameters
+    ----------
+    records : iterable of Bio.SeqRecord.SeqRecord
+        records to write
+    handle : file-like
+        text handle to write to, e.g. from open_file()
+    batch_size : int
+        number of records to format before each write
+
+    Returns
+    -------
+    int :
+        number of records written
+    """
+    count = 0
+    batch = []
+    writer = None
+    try:
+        for record in records:
+            batch.append(as_fasta(record))
+            if len(batch) >= batch_size:
+                if writer is None:
+                    writer = _BackgroundWriter(handle)
+                writer.write("".join(batch))
+                count += len(batch)
+                batch.clear()
+
+        if batch:
+            if writer is None:
+                handle.write("".join(batch))
+            else:
+                writer.write("".join(batch))
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return count
+
+class _BackgroundWriter:
+    """Write strings to a handle from a background thread.
+
+    The bounded queue applies backpressure to the producer when writing falls
+    behind. An error raised by the handle is re-raised in the producer by the
+    next call to `write` or by `close`.
+    """
+    def __init__(self, handle, queue_size=WRITE_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(handle,), daemon=True)
+        self._thread.start()
+
+    def _run(self, handle):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                return
+            # After an error, keep draining the queue so the producer never
+            # blocks on a full queue.
+            if self._error is None:
+                try:
+                    handle.write(data)
+                except BaseException as error:
+                    self._error = error
+
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(data)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+class SequenceWriter:
+    """Write SeqRecords in FASTA format to one file across many calls.
+
+    The file is opened once with open_file(), so compressed outputs are
+    supported and the compression stream is only set up once, no matter how
+    many times `write` is called. Use as a context manager or call `close`.
+
+    Attributes
+    ----------
+    count : int
+        number of records written so far
+    """
+    def __init__(self, fname, mode="w"):
+        self._stack = ExitStack()
+        self._handle = self._stack.enter_context(open_file(fname, mode))
+        self.count = 0
+
+    def write(self, records):
+        """Write a single SeqRecord or an iterable of SeqRecords."""
+        if isinstance(records, SeqRecord):
+            records = [records]
+        self.count += write_fasta(records, self._handle)
+
+    def close(self):
+        self._stack.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        return self._stack.__exit__(*exc_details)
 
 def is_vcf(fname):
     """Convenience method to check if a file is a vcf file.
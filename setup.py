@@ -58,7 +58,8 @@ setuptools.setup(
         'full': [
             "cvxopt >=1.1.9, ==1.*",
             "matplotlib >=2.0, ==2.*",
-            "seaborn >=0.9.0, ==0.9.*"
+            "seaborn >=0.9.0, ==0.9.*",
+            "zstandard >=0.15.0, ==0.*"
         ],
         'dev': [
             "cram >=0.7, ==0.*",
@@ -235,6 +235,37 @@ class TestAlign:
         with pytest.raises(align.AlignmentError):
             assert align.read_sequences(data_file)
 
+    def test_read_sequences_from_multiple_files(self, tmpdir):
+        first = write_strains(tmpdir, "first", [SeqRecord(Seq("ACGT"), id="SEQ1"), SeqRecord(Seq("AAAA"), id="SEQ2")])
+        second = write_strains(tmpdir, "second", [SeqRecord(Seq("AAAA"), id="SEQ2"), SeqRecord(Seq("TTTT"), id="SEQ3")])
+        result = align.read_sequences(first, second)
+        assert [record.id for record in result] == ["SEQ1", "SEQ2", "SEQ3"]
+
+    def test_read_sequences_missing_file(self, tmpdir):
+        first = write_strains(tmpdir, "first", [SeqRecord(Seq("ACGT"), id="SEQ1")])
+        with pytest.raises(align.AlignmentError):
+            align.read_sequences(first, str(tmpdir / "missing.fasta"))
+
+    def test_read_sequences_matches_seqio(self, tmpdir):
+        data_file = write_strains(tmpdir, "described", [
+            SeqRecord(Seq("ACGT"), id="SEQ1", description="SEQ1 first sequence"),
+            SeqRecord(Seq("TTGCA"), id="SEQ2", description=""),
+        ])
+        result = align.read_sequences(data_file)
+        expected = list(SeqIO.parse(data_file, "fasta"))
+        assert [(r.id, r.name, r.description, str(r.seq)) for r in result] == \
+            [(r.id, r.name, r.description, str(r.seq)) for r in expected]
+
+    def test_read_sequences_without_mmap(self, tmpdir, monkeypatch):
+        data_file = write_strains(tmpdir, "unmappable", [SeqRecord(Seq("ACGT"), id="SEQ1"), SeqRecord(Seq("TTGCA"), id="SEQ2")])
+
+        def unsupported_mmap(*args, **kwargs):
+            raise OSError(19, "No such device")
+
+        monkeypatch.setattr(align.mmap, "mmap", unsupported_mmap)
+        result = align.read_sequences(data_file)
+        assert [(record.id, str(record.seq)) for record in result] == [("SEQ1", "ACGT"), ("SEQ2", "TTGCA")]
+
     def test_prepare_no_alignment_or_ref(self, test_file, test_seqs, out_file):
         _, output, _ = align.prepare([test_file,], None, out_file, None, None)
         assert os.path.isfile(output), "Didn't write sequences where it said"
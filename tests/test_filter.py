@@ -1,7 +1,7 @@
 import argparse
-import random
 import shlex
 
+import numpy as np
 import pytest
 
 from Bio import SeqIO
@@ -18,16 +18,20 @@ def argparser():
         return parser.parse_args(shlex.split(args))
     return parse
 
-@pytest.fixture
-def sequences():
-    def random_seq(k):
-        return "".join(random.choices(("A","T","G","C"), k=k))
+def generate_sequences(n, k):
+    """Generate n random nucleotide sequences of length k named SEQ_1 to SEQ_n,
+    drawing all n * k nucleotides with one vectorized call."""
+    nucleotides = np.frombuffer(b"ATGC", dtype=np.uint8)
+    rows = nucleotides[np.random.default_rng().integers(0, 4, size=(n, k))]
     return {
-        "SEQ_1": SeqRecord(Seq(random_seq(10)), id="SEQ_1"),
-        "SEQ_2": SeqRecord(Seq(random_seq(10)), id="SEQ_2"),
-        "SEQ_3": SeqRecord(Seq(random_seq(10)), id="SEQ_3"),
+        "SEQ_%i" % i: SeqRecord(Seq(row.tobytes().decode("ascii")), id="SEQ_%i" % i)
+        for i, row in enumerate(rows, 1)
     }
 
+@pytest.fixture
+def sequences():
+    return generate_sequences(3, 10)
+
 @pytest.fixture
 def fasta_fn(tmpdir, sequences):
     fn = str(tmpdir / "sequences.fasta")
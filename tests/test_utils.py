@@ -1,9 +1,14 @@
 import datetime
+import gzip
 from unittest.mock import patch
 
 import pytest
 from freezegun import freeze_time
 
+from Bio import SeqIO
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
 from augur import utils
 
 class TestUtils:
@@ -129,3 +134,134 @@ class TestUtils:
         # Test incomplete date strings without ambiguous dates for the requested fields.
         assert not utils.is_date_ambiguous("2019", "year")
         assert not utils.is_date_ambiguous("2019-10", "month")
+
+    @pytest.mark.parametrize("decompressor", ["gzip", None])
+    def test_open_file_reads_gzip(self, tmpdir, decompressor):
+        """open_file should read gzipped files with or without an external decompressor"""
+        fname = str(tmpdir / "sequences.fasta.gz")
+        with gzip.open(fname, "wt") as fh:
+            fh.write(">SEQ1\nACGT\n>SEQ2\nTTGA\n")
+
+        with patch("augur.utils.shutil.which", return_value=decompressor):
+            with utils.open_file(fname, "r") as fh:
+                assert fh.read() == ">SEQ1\nACGT\n>SEQ2\nTTGA\n"
+
+    def test_open_file_raises_on_failed_decompression(self, tmpdir):
+        """open_file should raise an AugurException when the external decompressor fails"""
+        fname = str(tmpdir / "invalid.gz")
+        with open(fname, "w") as fh:
+            fh.write("not gzipped")
+
+        with pytest.raises(utils.AugurException):
+            with patch("augur.utils.shutil.which", return_value="gzip"):
+                with utils.open_file(fname, "r") as fh:
+                    fh.read()
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 1024])
+    def test_write_fasta(self, tmpdir, batch_size):
+        """write_fasta should write all records in FASTA format regardless of batch size"""
+        records = [SeqRecord(Seq("ACGT" * i), id="SEQ%i" % i, description="") for i in range(1, 6)]
+        fname = str(tmpdir / "sequences.fasta")
+        with open(fname, "w") as fh:
+            assert utils.write_fasta(iter(records), fh, batch_size=batch_size) == len(records)
+
+        written = list(SeqIO.parse(fname, "fasta"))
+        assert [(r.id, str(r.seq)) for r in written] == [(r.id, str(r.seq)) for r in records]
+
+    @pytest.mark.parametrize("extension", ["txt", "gz", "GZ", "bz2", "xz"])
+    def test_open_file_roundtrip(self, tmpdir, extension):
+        """open_file should pick the compression from the file extension when writing and reading"""
+        fname = str(tmpdir / "sequences.fasta.%s" % extension)
+        with utils.open_file(fname, "w") as fh:
+            fh.write(">SEQ1\nACGT\n")
+
+        with utils.open_file(fname, "r") as fh:
+            assert fh.read() == ">SEQ1\nACGT\n"
+
+    def test_open_file_roundtrip_zstd(self, tmpdir):
+        """open_file should write and read zstandard-compressed files when zstandard is installed"""
+        pytest.importorskip("zstandard")
+        fname = str(tmpdir / "sequences.fasta.zst")
+        with utils.open_file(fname, "w") as fh:
+            fh.write(">SEQ1\nACGT\n")
+
+        with utils.open_file(fname, "r") as fh:
+            assert fh.read() == ">SEQ1\nACGT\n"
+
+    def test_open_file_zstd_compresslevel_defaults_to_3(self, tmpdir, monkeypatch):
+        """open_file should compress .zst files at zstd's default level 3 unless AUGUR_COMPRESSLEVEL is set"""
+        zstandard = pytest.importorskip("zstandard")
+        monkeypatch.delenv("AUGUR_COMPRESSLEVEL", raising=False)
+        with patch("zstandard.ZstdCompressor", wraps=zstandard.ZstdCompressor) as m_compressor:
+            with utils.open_file(str(tmpdir / "default.txt.zst"), "w") as fh:
+                fh.write("ACGT\n")
+        assert m_compressor.call_args[1]["level"] == 3
+
+    def test_open_file_reads_multiple_zstd_frames(self, tmpdir):
+        """open_file should read every frame of a .zst file, not just the first"""
+        zstandard = pytest.importorskip("zstandard")
+        fname = str(tmpdir / "sequences.fasta.zst")
+        compressor = zstandard.ZstdCompressor()
+        with open(fname, "wb") as fh:
+            fh.write(compressor.compress(b">SEQ1\nACGT\n"))
+            fh.write(compressor.compress(b">SEQ2\nTTGA\n"))
+
+        with utils.open_file(fname, "r") as fh:
+            assert fh.read() == ">SEQ1\nACGT\n>SEQ2\nTTGA\n"
+
+    @pytest.mark.parametrize("extension", ["fasta", "fasta.gz"])
+    def test_sequence_writer_writes_across_calls(self, tmpdir, extension):
+        """SequenceWriter should keep records from every write call in a single file"""
+        records = [SeqRecord(Seq("ACGT"), id="SEQ%i" % i, description="") for i in range(1, 4)]
+        fname = str(tmpdir / "sequences.%s" % extension)
+        with utils.SequenceWriter(fname) as writer:
+            writer.write(records[0])
+            writer.write(records[1:])
+
+        assert writer.count == 3
+        with utils.open_file(fname, "r") as fh:
+            assert [record.id for record in SeqIO.parse(fh, "fasta")] == ["SEQ1", "SEQ2", "SEQ3"]
+
+    def test_write_fasta_raises_handle_errors(self):
+        """write_fasta should re-raise errors from the background writer"""
+        class FullHandle:
+            def write(self, data):
+                raise OSError("No space left on device")
+
+        records = (SeqRecord(Seq("ACGT"), id="SEQ%i" % i) for i in range(100))
+        with pytest.raises(OSError):
+            utils.write_fasta(records, FullHandle(), batch_size=2)
+
+    def test_open_file_compresslevel_defaults_to_6(self, tmpdir, monkeypatch):
+        """open_file should compress at level 6 unless AUGUR_COMPRESSLEVEL is set"""
+        monkeypatch.delenv("AUGUR_COMPRESSLEVEL", raising=False)
+        with patch("augur.utils.gzip.GzipFile", wraps=gzip.GzipFile) as m_gzip_file:
+            with utils.open_file(str(tmpdir / "default.txt.gz"), "w") as fh:
+                fh.write("ACGT\n")
+        assert m_gzip_file.call_args[1]["compresslevel"] == 6
+
+    def test_open_file_compresslevel_from_environment(self, tmpdir, monkeypatch):
+        """open_file should read AUGUR_COMPRESSLEVEL when the file is opened"""
+        monkeypatch.setenv("AUGUR_COMPRESSLEVEL", "1")
+        with patch("augur.utils.gzip.GzipFile", wraps=gzip.GzipFile) as m_gzip_file:
+            with utils.open_file(str(tmpdir / "fast.txt.gz"), "w") as fh:
+                fh.write("ACGT\n")
+        assert m_gzip_file.call_args[1]["compresslevel"] == 1
+
+    def test_open_file_invalid_compresslevel(self, tmpdir, monkeypatch):
+        """open_file should raise an AugurException for a non-integer AUGUR_COMPRESSLEVEL"""
+        monkeypatch.setenv("AUGUR_COMPRESSLEVEL", "fast")
+        with pytest.raises(utils.AugurException):
+            with utils.open_file(str(tmpdir / "invalid.txt.gz"), "w") as fh:
+                fh.write("ACGT\n")
+
+    @pytest.mark.parametrize("extension", ["txt", "gz"])
+    def test_open_file_reads_with_invalid_compresslevel(self, tmpdir, monkeypatch, extension):
+        """open_file should only use AUGUR_COMPRESSLEVEL when writing compressed files"""
+        fname = str(tmpdir / "sequences.{}".format(extension))
+        with utils.open_file(fname, "w") as fh:
+            fh.write(">SEQ1\nACGT\n")
+
+        monkeypatch.setenv("AUGUR_COMPRESSLEVEL", "fast")
+        with utils.open_file(fname, "r") as fh:
+            assert fh.read() == ">SEQ1\nACGT\n"